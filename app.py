@@ -1,10 +1,48 @@
+import functools
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
 from io import BytesIO
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Union
+from pandas.tseries.api import guess_datetime_format
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+try:
+    from tsdownsample import LTTBDownsampler
+except ImportError:
+    LTTBDownsampler = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    from diskcache import Cache
+except ImportError:
+    Cache = None
 
 # --- 1. CONFIGURATION & SETUP ---
+# Copy-on-Write (always on from pandas 3.0): derived frames share column buffers
+# until one of them is written, so transformations only copy the columns they touch
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
 st.set_page_config(
     page_title="DataNexus | Enterprise Analytics Hub",
     page_icon="",
@@ -40,36 +78,664 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- 2. SESSION STATE MANAGEMENT ---
-if 'df' not in st.session_state:
-    st.session_state['df'] = None
+# The DataFrame itself lives in a shared cache_resource store (see get_store);
+# the session only keeps its key and the list of transformations applied to it.
+if 'file_key' not in st.session_state:
+    st.session_state['file_key'] = None
+if 'ops' not in st.session_state:
+    st.session_state['ops'] = []
 if 'file_name' not in st.session_state:
     st.session_state['file_name'] = None
 
+# Parquet snapshots of parsed uploads, keyed by content hash; heavy statistics
+# are persisted under CACHE_DIR / "results" (see disk_cached)
+CACHE_DIR = Path(".nexus_cache")
+DISK_CACHE_SIZE_LIMIT = 2 << 30
+SNAPSHOT_SIZE_LIMIT = 2 << 30
+# Part of every persisted result's key: editing any line of the app (helpers,
+# constants, a decorated function) invalidates results computed by older code
+SOURCE_VERSION = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=8).hexdigest()
+
+# Correlation view: labelled heatmap up to CORR_TEXT_MAX_COLS, plain heatmap up to
+# HINTON_MIN_COLS, Hinton diagram beyond that; at most CORR_MAX_COLS are shown
+CORR_TEXT_MAX_COLS = 30
+HINTON_MIN_COLS = 50
+CORR_MAX_COLS = 100
+
+# Scatter plots above this many rows render with WebGL; Bar/Line x-axes with more
+# distinct values than AGG_MIN_CATEGORIES are aggregated server-side
+WEBGL_MIN_POINTS = 2000
+AGG_MIN_CATEGORIES = 5000
+
+# Line charts with more rows than this are downsampled with LTTB
+LTTB_MAX_POINTS = 3000
+
+# Uploads kept in process memory at once (least recently used evicted first)
+STORE_MAX_ENTRIES = 8
+
 # --- 3. HELPER FUNCTIONS (Typed & Documented) ---
 
+def _cache_path(file_bytes_hash: str) -> Path:
+    """
+    Returns the Parquet snapshot location for a file content hash.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return CACHE_DIR / f"{file_bytes_hash}.parquet"
+
+def _read_snapshot(path: Path) -> Optional[pd.DataFrame]:
+    """
+    Memory-maps a Parquet snapshot. Returns None if it is missing; a corrupt
+    snapshot is deleted so the caller re-parses the upload and rewrites it.
+    """
+    if not path.exists():
+        return None
+    try:
+        source = pa.memory_map(str(path))
+        df = pq.read_table(source).to_pandas(zero_copy_only=False, self_destruct=True)
+    except (pa.ArrowException, OSError):
+        path.unlink(missing_ok=True)
+        return None
+    os.utime(path)  # mtime doubles as last-access time for eviction
+    return df
+
+def _write_snapshot(df: pd.DataFrame, path: Path) -> None:
+    """
+    Atomically writes a Parquet snapshot via a per-writer temp file, then evicts
+    the least recently used snapshots beyond SNAPSHOT_SIZE_LIMIT.
+    Best-effort: e.g. non-string Excel headers can't be stored as Parquet.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_name, compression="zstd")
+        os.replace(tmp_name, path)
+    except (ValueError, TypeError, OSError, pa.ArrowException):
+        Path(tmp_name).unlink(missing_ok=True)
+        return
+    
+    snapshots = []
+    for p in CACHE_DIR.glob("*.parquet"):
+        try:
+            stat = p.stat()
+        except FileNotFoundError:
+            continue
+        snapshots.append((stat.st_mtime, stat.st_size, p))
+    total = sum(size for _, size, _ in snapshots)
+    for _, size, p in sorted(snapshots):
+        if total <= SNAPSHOT_SIZE_LIMIT or p == path:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+
+def _file_hash(file) -> str:
+    """
+    Returns a content hash of the uploaded file. xxh3 (SIMD) hashes at memory
+    bandwidth, so hashing the whole buffer stays cheap even for large uploads.
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(file.getbuffer())
+    return hashlib.blake2b(file.getbuffer(), digest_size=16).hexdigest()
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrinks a freshly loaded DataFrame: downcasts int64/float64 to the smallest
+    fitting type, parses date-like text columns and encodes low-cardinality
+    text columns as categories.
+    """
+    out = df.copy(deep=False)
+    for i in range(out.shape[1]):
+        ser = out.iloc[:, i]
+        kind = ser.dtype.kind
+        if kind == "i":
+            ser = pd.to_numeric(ser, downcast="integer")
+        elif kind == "u":
+            ser = pd.to_numeric(ser, downcast="unsigned")
+        elif kind == "f":
+            ser = pd.to_numeric(ser, downcast="float")
+        elif kind == "O" and len(ser) > 0:
+            # Guess a date format from a sample so the full column parses vectorized
+            sample = ser.dropna().head(100)
+            inferred = pd.api.types.infer_dtype(sample, skipna=True) if len(sample) > 0 else "empty"
+            fmt = guess_datetime_format(sample.iloc[0]) if inferred == "string" else None
+            # The Arrow CSV reader yields datetime.date objects for ISO date columns
+            if fmt is not None or inferred in ("date", "datetime"):
+                try:
+                    ser = pd.to_datetime(ser, format=fmt)
+                except (ValueError, TypeError, OverflowError):
+                    pass
+            if ser.dtype.kind == "O" and ser.nunique() / len(ser) < 0.5:
+                ser = ser.astype("category")
+        out.isetitem(i, ser)
+    return out
+
+# Keyed on the content hash rather than the per-upload file_id, so re-uploading the
+# same file hits the cache; the leading underscore keeps Streamlit from hashing _file
 @st.cache_data
-def load_data(file) -> Optional[pd.DataFrame]:
+def load_data(_file, file_hash: str, optimize: bool = True) -> Optional[pd.DataFrame]:
     """
-    Loads CSV or Excel data into a Pandas DataFrame using Lazy Loading.
+    Loads CSV or Excel data into a Pandas DataFrame.
+    The first load parses the file and persists a Parquet snapshot; later
+    loads of the same content memory-map the snapshot instead of re-parsing.
     Args:
-        file: The uploaded file object.
+        _file: The uploaded file object.
+        file_hash: Content hash of the file (see _file_hash), computed once by the caller.
+        optimize: Downcast dtypes after loading (see optimize_dtypes).
     Returns:
         pd.DataFrame or None if error occurs.
     """
     try:
-        if file.name.endswith('.csv'):
-            return pd.read_csv(file)
-        elif file.name.endswith('.xlsx'):
-            return pd.read_excel(file)
+        file = _file
+        path = _cache_path(file_hash)
+        df = _read_snapshot(path)
+        if df is None:
+            # Compiled readers first (multi-threaded Arrow CSV, Rust calamine); the
+            # Arrow reader is stricter, so fall back to pandas' default engines
+            file.seek(0)
+            if file.name.endswith('.csv'):
+                try:
+                    df = pd.read_csv(file, engine="pyarrow")
+                except ValueError:
+                    file.seek(0)
+                    df = pd.read_csv(file)
+            elif file.name.endswith('.xlsx'):
+                try:
+                    df = pd.read_excel(file, engine="calamine")
+                except ImportError:
+                    file.seek(0)
+                    df = pd.read_excel(file)
+            else:
+                return None
+            _write_snapshot(df, path)
+        return optimize_dtypes(df) if optimize else df
     except Exception as e:
         st.error(f"❌ Error loading file: {e}")
         return None
 
-def convert_df(df: pd.DataFrame) -> bytes:
+@st.cache_resource(max_entries=STORE_MAX_ENTRIES)
+def get_store(key: str) -> dict:
+    """
+    Process-wide holder for the canonical DataFrame of an upload.
+    Shared by every session working on the same file, so the frame is kept once;
+    only the STORE_MAX_ENTRIES most recently used uploads stay in memory.
+    """
+    return {"df": None}
+
+def _range_filter(df: pd.DataFrame, col: str, lo: float, hi: float) -> pd.DataFrame:
+    """
+    Keeps rows where lo <= df[col] <= hi. Sorted numeric columns are bracketed
+    with a binary search (no mask, no copy); otherwise both bounds are evaluated
+    in a single fused pass.
+    """
+    ser = df[col]
+    a = ser.to_numpy()
+    if a.dtype.kind not in "iuf":
+        return df[(ser >= lo) & (ser <= hi)]
+    if ser.is_monotonic_increasing:
+        start = np.searchsorted(a, lo, side="left")
+        stop = np.searchsorted(a, hi, side="right")
+        return df.iloc[start:stop]
+    # numexpr only supports 32/64-bit numerics; downcast int8/int16 columns use NumPy
+    if ne is not None and a.dtype in (np.int32, np.int64, np.float32, np.float64):
+        mask = ne.evaluate("(a >= lo) & (a <= hi)")
+    else:
+        mask = (a >= lo) & (a <= hi)
+    return df[mask]
+
+def _apply_op(df: pd.DataFrame, op: tuple) -> pd.DataFrame:
+    """
+    Applies a single transformation step, e.g. ("drop", cols) or ("filter", col, lo, hi).
+    Never mutates the input frame.
+    """
+    kind = op[0]
+    if kind == "drop":
+        return df.drop(columns=list(op[1]))
+    elif kind == "dropna":
+        return df.dropna(subset=[op[1]])
+    elif kind in ("fillna", "fillna_mean"):
+        col = op[1]
+        ser = df[col]
+        if kind == "fillna_mean":
+            a = ser.to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(a)
+            value = a[present].mean() if present.any() else np.nan
+        else:
+            value = op[2]
+        if isinstance(ser.dtype, pd.CategoricalDtype):
+            # Text categories (from optimize_dtypes) stay text: a mixed str/int
+            # category set cannot be serialized to Arrow, e.g. for display
+            if pd.api.types.infer_dtype(ser.cat.categories) == "string":
+                value = str(value)
+            if value not in ser.cat.categories:
+                ser = ser.cat.add_categories([value])
+        # Shallow copy + column assignment: only the filled column is allocated
+        out = df.copy(deep=False)
+        out[col] = ser.fillna(value)
+        return out
+    elif kind == "filter":
+        _, col, lo, hi = op
+        return _range_filter(df, col, lo, hi)
+    raise ValueError(f"Unknown transformation: {kind}")
+
+@st.cache_resource(max_entries=32)
+def apply_ops(key: str, ops: tuple) -> pd.DataFrame:
+    """
+    Materializes the stored frame with the session's transformation script applied.
+    Returned frames are shared between sessions (no copy per call), so callers
+    must treat them as read-only; with no ops this is the stored frame itself.
+    """
+    df = get_store(key)["df"]
+    for op in ops:
+        df = _apply_op(df, op)
+    return df
+
+def current_df() -> Optional[pd.DataFrame]:
+    """
+    Returns the processed DataFrame for this session, or None if nothing is loaded.
+    """
+    key = st.session_state['file_key']
+    if key is None or get_store(key)["df"] is None:
+        return None
+    return apply_ops(key, tuple(st.session_state['ops']))
+
+def record_op(op: tuple) -> bool:
+    """
+    Appends a transformation step to the session's script only if it applies
+    cleanly; a failing step is reported once instead of being replayed (and
+    failing again) on every later render.
+    """
+    ops = tuple(st.session_state['ops']) + (op,)
+    try:
+        # Also warms the apply_ops cache for the rerun that follows
+        apply_ops(st.session_state['file_key'], ops)
+    except Exception as e:
+        st.error(f"Operation failed: {e}")
+        return False
+    st.session_state['ops'].append(op)
+    return True
+
+def count_duplicates(df: pd.DataFrame) -> int:
+    """
+    Counts duplicate rows as df.duplicated() does, but screened by vectorized row
+    hashes: only rows whose hash collides with another row's are compared value by
+    value, which also rules out hash-equal but different rows (1 vs "1").
+    """
+    if df.shape[1] == 0 or len(df) == 0:
+        return 0
+    keyed = df.copy(deep=False)
+    for i in range(df.shape[1]):
+        ser = df.iloc[:, i]
+        if ser.dtype.kind == "f":
+            # Floats are hashed by their bits: fold -0.0 into 0.0 and all NaNs into one
+            keyed.isetitem(i, ser.where(ser.notna()) + 0.0)
+    h = pd.util.hash_pandas_object(keyed, index=False)
+    candidates = h.duplicated(keep=False).to_numpy()
+    if not candidates.any():
+        return 0
+    return int(df[candidates].duplicated().sum())
+
+@st.cache_resource
+def get_disk_cache():
+    """
+    Process-wide handle on the on-disk result cache, or None if diskcache is missing.
+    """
+    if Cache is None:
+        return None
+    return Cache(str(CACHE_DIR / "results"), size_limit=DISK_CACHE_SIZE_LIMIT)
+
+def disk_cached(fn):
+    """
+    Decorator persisting fn's results on disk so they survive app restarts.
+    DataFrames are stored as zstd-compressed Arrow IPC streams, other values are
+    pickled by diskcache. Arguments must be content-derived (file hash, ops), and
+    the key includes SOURCE_VERSION so any code change invalidates old entries.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        cache = get_disk_cache()
+        if cache is None:
+            return fn(*args, **kwargs)
+        entry_key = hashlib.blake2b(repr((SOURCE_VERSION, fn.__qualname__, args, kwargs)).encode(),
+                                    digest_size=16).hexdigest()
+        hit = cache.get(entry_key)
+        if hit is not None:
+            fmt, payload = hit
+            return pa.ipc.open_stream(payload).read_pandas() if fmt == "arrow" else payload
+        
+        out = fn(*args, **kwargs)
+        if isinstance(out, pd.DataFrame):
+            try:
+                table = pa.Table.from_pandas(out)
+                sink = BytesIO()
+                with pa.ipc.new_stream(sink, table.schema,
+                                       options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+                    writer.write_table(table)
+                cache[entry_key] = ("arrow", sink.getvalue())
+            except (pa.ArrowException, ValueError, TypeError):
+                # Frames Arrow cannot type are simply not persisted
+                pass
+        else:
+            cache[entry_key] = ("pickle", out)
+        return out
+    return wrapper
+
+# Every statistic below is a separate cached getter keyed by (file, transformation
+# script): it is computed only when the view showing it is rendered, and only
+# recomputed after the user applies a new transformation.
+
+@st.cache_data
+def null_counts(key: str, ops: tuple) -> pd.Series:
+    """
+    Missing values per column.
+    """
+    return apply_ops(key, ops).isna().sum()
+
+@st.cache_data
+def column_meta(key: str, ops: tuple) -> dict:
+    """
+    Per-column (dtype kind, min, max, distinct count) of a dataset version, so
+    widgets read bounds from here instead of rescanning columns on every rerun.
+    min/max are None for non-real (text, datetime, duration) or all-missing columns.
+    """
+    df = apply_ops(key, ops)
+    # By dtype kind rather than select_dtypes("number"), which also matches timedelta64
+    numeric = df.loc[:, [df[c].dtype.kind in "iufb" for c in df.columns]]
+    bounds = numeric.agg(["min", "max"]) if numeric.shape[1] else pd.DataFrame()
+    nunique = df.nunique()
+    meta = {}
+    for c in df.columns:
+        lo = hi = None
+        if c in bounds.columns and pd.notna(bounds.at["min", c]):
+            lo, hi = float(bounds.at["min", c]), float(bounds.at["max", c])
+        meta[c] = (df[c].dtype.kind, lo, hi, int(nunique[c]))
+    return meta
+
+DESCRIBE_INDEX = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+def _column_stats(arr: pa.ChunkedArray) -> list:
+    """
+    describe() statistics of one Arrow column; nulls (pandas NaN) are skipped.
+    """
+    min_max = pc.min_max(arr).as_py()
+    quartiles = pc.quantile(arr, q=[0.25, 0.5, 0.75]).to_pylist()
+    return [pc.count(arr).as_py(), pc.mean(arr).as_py(), pc.stddev(arr, ddof=1).as_py(),
+            min_max["min"], *quartiles, min_max["max"]]
+
+def _arrow_describe(numeric_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    describe() of real-valued columns with pyarrow.compute kernels; columns are
+    processed in parallel threads since the kernels release the GIL.
+    """
+    table = pa.Table.from_pandas(numeric_df, preserve_index=False)
+    with ThreadPoolExecutor() as pool:
+        stats = list(pool.map(_column_stats, table.columns))
+    return pd.DataFrame(list(zip(*stats)), index=DESCRIBE_INDEX, columns=numeric_df.columns, dtype=float)
+
+@st.cache_data
+@disk_cached
+def describe_stats(key: str, ops: tuple) -> pd.DataFrame:
+    """
+    Statistical summary in the layout of DataFrame.describe(), computed with
+    pyarrow.compute kernels (see _arrow_describe).
+    """
+    df = apply_ops(key, ops)
+    numeric_df = df.select_dtypes(include="number")
+    if numeric_df.shape[1] == 0:
+        # No numeric columns: describe() summarizes the text columns instead
+        return df.describe() if df.shape[1] else pd.DataFrame()
+    
+    # Only real-valued columns go through Arrow: "number" also matches timedelta64,
+    # which has no min_max/mean kernels, so durations are left to describe()
+    real = [c for c in numeric_df.columns if numeric_df[c].dtype.kind in "iuf"]
+    if len(real) < numeric_df.shape[1]:
+        rest = numeric_df.drop(columns=real).describe()
+        return pd.concat([_arrow_describe(numeric_df[real]), rest], axis=1)[numeric_df.columns]
+    return _arrow_describe(numeric_df)
+
+@st.cache_data
+@disk_cached
+def profile_summary(key: str, ops: tuple) -> dict:
+    """
+    Dataset telemetry KPIs: shape, total missing values and duplicate rows.
     """
-    Converts DataFrame to CSV bytes for download.
+    df = apply_ops(key, ops)
+    return {
+        "shape": df.shape,
+        "n_null": int(null_counts(key, ops).sum()),
+        "n_dup": count_duplicates(df),
+    }
+
+@st.cache_data
+@disk_cached
+def correlation_matrix(key: str, ops: tuple, columns: tuple) -> pd.DataFrame:
+    """
+    Pairwise Pearson correlation of the given numeric columns, matching
+    DataFrame.corr() when missing values differ between columns. Sums are float32
+    matrix products (SGEMM via BLAS): without missing values a single XᵀX over the
+    standardized columns; otherwise every pairwise sum over the zero-filled values
+    X and the presence mask M: counts MᵀM, sums XᵀM, squares (X²)ᵀM and cross terms XᵀX.
     """
-    return df.to_csv(index=False).encode('utf-8')
+    df = apply_ops(key, ops)
+    X = df[list(columns)].to_numpy(dtype=np.float32, copy=True)
+    mask = ~np.isnan(X)
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if mask.all():
+            n = len(X)
+            X -= X.mean(axis=0, dtype=np.float64).astype(np.float32)
+            var = np.einsum("ij,ij->j", X, X, dtype=np.float64) / n
+            X /= np.sqrt(np.where(var > 0, var, 1)).astype(np.float32)
+            corr = (X.T @ X).astype(np.float64) / n
+            undefined = np.logical_or.outer(~(var > 0), ~(var > 0)) | (n < 2)
+        else:
+            M = mask.astype(np.float32)
+            # Shifting by the column mean leaves r unchanged but keeps the sums small
+            X -= np.nanmean(X, axis=0, dtype=np.float64).astype(np.float32)
+            X[~mask] = 0
+            n = (M.T @ M).astype(np.float64)
+            Sx = (X.T @ M).astype(np.float64)
+            Sxy = (X.T @ X).astype(np.float64)
+            np.multiply(X, X, out=X)
+            Sxx = (X.T @ M).astype(np.float64)
+            var = Sxx - Sx * Sx / n
+            corr = (Sxy - Sx * Sx.T / n) / np.sqrt(var * var.T)
+            undefined = (n < 2) | ~(var > 0) | ~(var.T > 0)
+            var = np.diag(var)
+    
+    # Constant or too-short overlaps have no defined correlation, as in DataFrame.corr()
+    corr[undefined] = np.nan
+    np.clip(corr, -1, 1, out=corr)
+    np.fill_diagonal(corr, np.where(var > 0, 1, np.nan))
+    return pd.DataFrame(corr, index=list(columns), columns=list(columns))
+
+def _hinton_trace(corr: pd.DataFrame, tau: float) -> go.Scattergl:
+    """
+    Hinton diagram as a single WebGL scatter: one square per cell whose area
+    encodes |r| and whose color encodes the sign. Cells with |r| < tau are dropped.
+    Cells are placed at integer grid positions (labelled through tickvals/ticktext);
+    the column names of each cell ride along in customdata for the hover label,
+    which CORR_MAX_COLS keeps bounded.
+    """
+    z = corr.to_numpy()
+    n = z.shape[0]
+    rows, cols = np.nonzero(np.abs(np.nan_to_num(z)) >= max(tau, 1e-9))
+    r = z[rows, cols].astype(np.float32)
+    cell = max(2.0, 700 / n)
+    names = np.array([str(c) for c in corr.columns], dtype=object)
+    return go.Scattergl(
+        x=cols.astype(np.int16), y=rows.astype(np.int16), mode="markers",
+        customdata=np.column_stack([names[cols], names[rows]]),
+        marker=dict(symbol="square", size=np.sqrt(np.abs(r)) * cell,
+                    color=r, colorscale="RdBu_r", cmin=-1, cmax=1, showscale=True),
+        hovertemplate="%{customdata[0]} / %{customdata[1]}<br>r = %{marker.color:.2f}<extra></extra>",
+    )
+
+def correlation_figure(corr: pd.DataFrame, tau: float = 0.0) -> go.Figure:
+    """
+    Builds the correlation view. Wide matrices are capped to the columns with
+    the strongest mean |r| and drawn without per-cell text labels, which would
+    otherwise add one annotation per cell to the figure JSON; very wide ones
+    are drawn as a Hinton diagram (see _hinton_trace).
+    """
+    if corr.shape[0] > CORR_MAX_COLS:
+        importance = np.nanmean(np.abs(corr.to_numpy()), axis=0)
+        keep = np.sort(np.argsort(-importance)[:CORR_MAX_COLS])
+        corr = corr.iloc[keep, keep]
+    
+    z = corr.to_numpy()
+    if z.shape[0] > HINTON_MIN_COLS:
+        fig = go.Figure(_hinton_trace(corr, tau))
+        fig.update_layout(height=800, template="plotly_white")
+        ticks = dict(tickvals=np.arange(z.shape[0]), ticktext=[str(c) for c in corr.columns],
+                     tickfont=dict(size=8), showgrid=False, zeroline=False)
+        fig.update_xaxes(range=[-1, z.shape[0]], **ticks)
+        fig.update_yaxes(range=[z.shape[0], -1], **ticks)
+        return fig
+    if z.shape[0] > CORR_TEXT_MAX_COLS:
+        trace = go.Heatmap(z=z, x=corr.columns, y=corr.index, colorscale="RdBu_r", zmin=-1, zmax=1)
+    else:
+        trace = go.Heatmap(z=z, x=corr.columns, y=corr.index, colorscale="RdBu_r", zmin=-1, zmax=1,
+                           text=np.round(z, 2), texttemplate="%{text}")
+    fig = go.Figure(trace)
+    fig.update_yaxes(autorange="reversed")
+    return fig
+
+def preview_table(df: pd.DataFrame, columns: list, rows: int = 50) -> Union[pa.Table, pd.DataFrame]:
+    """
+    Slices the first rows of the selected columns into a narrow Arrow table,
+    so Streamlit only serializes what is actually displayed.
+    """
+    head = df.iloc[:rows].loc[:, columns]
+    try:
+        return pa.Table.from_pandas(head, preserve_index=False)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Mixed-type object columns: let Streamlit apply its own conversion
+        return head
+
+def aggregate_by_x(df: pd.DataFrame, x_axis: str, y_axis: str, color_enc: Optional[str]) -> pd.DataFrame:
+    """
+    Collapses rows to the mean y per x value (and color group), so a chart over a
+    high-cardinality x-axis carries one point per category instead of one per row.
+    """
+    keys = [x_axis] if color_enc in (None, x_axis, y_axis) else [x_axis, color_enc]
+    return df.groupby(keys, observed=True)[y_axis].mean().reset_index()
+
+@st.cache_data
+def lttb_downsample(key: str, ops: tuple, x_axis: str, y_axis: str, n_out: int = LTTB_MAX_POINTS) -> pd.DataFrame:
+    """
+    Reduces a line series to n_out points with Largest-Triangle-Three-Buckets,
+    which keeps the visual shape (peaks and troughs) of the full series.
+    """
+    df = apply_ops(key, ops)[[x_axis, y_axis]].dropna().sort_values(x_axis, kind="stable")
+    # tsdownsample rejects 8-bit x arrays and tz-aware datetimes (object arrays):
+    # datetimes go through their int64 epoch values, numbers through float64
+    if df[x_axis].dtype.kind == "M":
+        x = df[x_axis].astype("int64").to_numpy()
+    else:
+        x = df[x_axis].to_numpy(dtype=np.float64)
+    y = df[y_axis].to_numpy(dtype=np.float64)
+    idx = LTTBDownsampler().downsample(x, y, n_out=n_out)
+    return df.iloc[idx]
+
+def require_df(fn):
+    """
+    Decorator for modules that need data: calls fn with the session's processed
+    DataFrame, or shows the 'no data' warning and skips the module entirely.
+    """
+    @functools.wraps(fn)
+    def wrapper():
+        df = current_df()
+        if df is None:
+            st.warning("⚠️ No data loaded. Please go to the Ingestion module.")
+            return
+        return fn(df)
+    return wrapper
+
+def _pandas_csv_columns(table: pa.Table) -> pa.Table:
+    """
+    Rewrites columns whose Arrow CSV rendering differs from DataFrame.to_csv:
+    booleans become True/False, and naive timestamps drop the zero fraction
+    (.000000), or the time entirely when every value falls on midnight.
+    """
+    for i, field in enumerate(table.schema):
+        col = table.column(i)
+        if pa.types.is_boolean(field.type):
+            col = pc.if_else(col, "True", "False")
+        elif pa.types.is_timestamp(field.type) and field.type.tz is None:
+            if pc.all(pc.equal(pc.floor_temporal(col, unit="day"), col)).as_py() is not False:
+                col = col.cast(pa.date32())
+            else:
+                try:
+                    col = col.cast(pa.timestamp("s"))
+                except pa.ArrowInvalid:
+                    # Sub-second values keep their fraction
+                    continue
+        else:
+            continue
+        table = table.set_column(i, field.name, col)
+    return table
+
+@st.cache_data
+def convert_df(key: str, ops: tuple) -> bytes:
+    """
+    Converts a dataset version to CSV bytes for download.
+    Arrow's C++ writer streams straight into a bytes buffer, avoiding the
+    intermediate Python str built by DataFrame.to_csv.
+    """
+    df = apply_ops(key, ops)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Mixed-type object columns have no Arrow type
+        table = None
+    if table is None or table.num_columns == 0:
+        return df.to_csv(index=False).encode('utf-8')
+    # Stay close to DataFrame.to_csv output: pandas' own header line and no quotes
+    # unless some value contains a delimiter, quote or newline (Arrow's "needed"
+    # style would quote every string)
+    table = _pandas_csv_columns(table)
+    header = df.iloc[:0].to_csv(index=False).encode('utf-8')
+    for quoting_style in ("none", "needed"):
+        buf = BytesIO(header)
+        buf.seek(0, 2)
+        try:
+            pcsv.write_csv(table, buf, write_options=pcsv.WriteOptions(include_header=False,
+                                                                       quoting_style=quoting_style))
+            break
+        except pa.ArrowInvalid:
+            continue
+    return buf.getvalue()
+
+def _arrow_convertible(col: pd.Series) -> bool:
+    """
+    Whether pyarrow can infer a single type for a column.
+    """
+    try:
+        pa.array(col, from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        return False
+    return True
+
+@st.cache_data
+def convert_df_parquet(key: str, ops: tuple) -> bytes:
+    """
+    Converts a dataset version to zstd-compressed Parquet bytes for download.
+    """
+    df = apply_ops(key, ops)
+    if not all(isinstance(c, str) for c in df.columns):
+        # Parquet requires string column names (e.g. numeric Excel headers)
+        df = df.rename(columns=str)
+    buf = BytesIO()
+    try:
+        df.to_parquet(buf, engine="pyarrow", compression="zstd", index=False)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Mixed-type object columns (e.g. [1, "x", 2.5]) have no Arrow type: export them as text
+        df = df.assign(**{
+            c: df[c].astype("string") for c in df.select_dtypes(include="object").columns
+            if not _arrow_convertible(df[c])
+        })
+        buf = BytesIO()
+        df.to_parquet(buf, engine="pyarrow", compression="zstd", index=False)
+    return buf.getvalue()
 
 # --- 4. SIDEBAR NAVIGATION ---
 with st.sidebar:
@@ -84,184 +750,254 @@ with st.sidebar:
         index=0
     )
     
+    optimize = st.toggle(
+        "Optimize dtypes", value=True,
+        help="Downcast numeric columns and store repetitive text as categories to cut memory."
+    )
+    
     st.divider()
     st.info("System Status: Online \nVersion: 1.2.0 (Stable)")
 
 # --- 5. MAIN MODULES ---
 
 # === MODULE 1: INGESTION ===
-if menu == "📁 Ingestion":
-    st.header("📂 Data Ingestion Interface")
+def ingestion_module() -> None:
+    """
+    Upload, parse and register a dataset, then show its telemetry and a preview.
+    """
     st.markdown("Upload raw datasets (`.csv`, `.xlsx`) to initialize the ETL pipeline.")
     
     uploaded_file = st.file_uploader("Drag and drop source file", type=['csv', 'xlsx'])
     
     if uploaded_file is not None:
-        df = load_data(uploaded_file)
+        file_hash = _file_hash(uploaded_file)
+        with st.status(f"Loading {uploaded_file.name}...") as status:
+            df = load_data(uploaded_file, file_hash, optimize)
+            status.update(label=f"Loaded {uploaded_file.name}",
+                          state="complete" if df is not None else "error")
         if df is not None:
-            st.session_state['df'] = df
+            key = f"{file_hash}-{'opt' if optimize else 'raw'}"
+            store = get_store(key)
+            if store["df"] is None:
+                store["df"] = df
+            if st.session_state['file_key'] != key:
+                st.session_state['file_key'] = key
+                st.session_state['ops'] = []
             st.session_state['file_name'] = uploaded_file.name
             st.toast("File successfully loaded!", icon="✅")
             
-            # KPI Metrics Row
+            # KPI Metrics Row (raw upload, before any transformation)
+            summary = profile_summary(key, ())
             st.subheader("Dataset Telemetry")
             c1, c2, c3, c4 = st.columns(4)
-            c1.metric("Total Rows", f"{df.shape[0]:,}")
-            c2.metric("Total Columns", df.shape[1])
-            c3.metric("Missing Values", df.isnull().sum().sum())
-            c4.metric("Duplicates", df.duplicated().sum())
+            c1.metric("Total Rows", f"{summary['shape'][0]:,}")
+            c2.metric("Total Columns", summary['shape'][1])
+            c3.metric("Missing Values", summary['n_null'])
+            c4.metric("Duplicates", summary['n_dup'])
             
             st.divider()
             st.subheader("Raw Data Preview")
-            # st.dataframe is standard, but st.data_editor is modern & interactive
-            st.data_editor(df.head(50), use_container_width=True)
+            preview_cols = st.multiselect("Preview columns", df.columns, default=list(df.columns[:10]))
+            st.dataframe(preview_table(df, preview_cols), use_container_width=True)
+
+# Modules (or parts of them) run as st.fragment: changing a widget inside reruns
+# only that block instead of the whole script
 
 # === MODULE 2: PROFILING ===
-elif menu == "🔍 Profiling":
-    st.header("📊 Automated Data Profiling")
+@require_df
+@st.fragment
+def profiling_module(df: pd.DataFrame) -> None:
+    """
+    Statistical summary, missing-value analysis and correlation matrix.
+    """
+    key, ops = st.session_state['file_key'], tuple(st.session_state['ops'])
     
-    if st.session_state['df'] is None:
-        st.warning("⚠️ No data loaded. Please go to the Ingestion module.")
-    else:
-        df = st.session_state['df']
-        
-        # Tabbed interface for cleaner UX
-        tab1, tab2, tab3 = st.tabs(["Overview", "Missing Data Analysis", "Correlation Matrix"])
-        
-        with tab1:
+    # Tabbed interface for cleaner UX; on_change="rerun" makes tabs lazy,
+    # so only the open tab computes its statistics
+    tab1, tab2, tab3 = st.tabs(["Overview", "Missing Data Analysis", "Correlation Matrix"],
+                               key="profiling_tab", on_change="rerun")
+    
+    with tab1:
+        if tab1.open:
             st.subheader("Statistical Summary")
-            st.dataframe(df.describe(), use_container_width=True)
-            
+            st.dataframe(describe_stats(key, ops), use_container_width=True)
+    
             st.subheader("Data Types")
             dtypes = df.dtypes.value_counts()
             fig_dtypes = px.pie(values=dtypes.values, names=dtypes.index.astype(str), 
                                 title="Column Data Type Distribution", hole=0.4,
                                 color_discrete_sequence=px.colors.qualitative.Safe)
             st.plotly_chart(fig_dtypes, use_container_width=True)
-
-        with tab2:
+    
+    with tab2:
+        if tab2.open:
             st.subheader("Null Value Heatmap")
-            missing = df.isnull().sum()
+            missing = null_counts(key, ops)
             if missing.sum() > 0:
                 st.bar_chart(missing[missing > 0])
             else:
                 st.success("✅ Dataset is clean. No missing values detected.")
-
-        with tab3:
+    
+    with tab3:
+        if tab3.open:
             st.subheader("Correlation Analysis")
             # Filter only numeric columns for correlation
-            numeric_df = df.select_dtypes(include=['float64', 'int64'])
+            # "number" also matches the downcast int8/int16/float32 columns
+            numeric_df = df.select_dtypes(include="number")
             if not numeric_df.empty:
-                corr = numeric_df.corr()
-                fig_corr = px.imshow(corr, text_auto=True, color_continuous_scale='RdBu_r', aspect="auto")
-                st.plotly_chart(fig_corr, use_container_width=True)
+                corr = correlation_matrix(key, ops, tuple(numeric_df.columns))
+                if corr.shape[0] > CORR_MAX_COLS:
+                    st.caption(f"Showing the {CORR_MAX_COLS} most correlated of {corr.shape[0]} numeric columns.")
+                tau = 0.0
+                if corr.shape[0] > HINTON_MIN_COLS:
+                    tau = st.slider("Hide correlations with |r| below", 0.0, 1.0, 0.0, 0.05)
+                st.plotly_chart(correlation_figure(corr, tau), use_container_width=True)
             else:
                 st.info("Not enough numeric columns to generate correlation matrix.")
 
 # === MODULE 3: TRANSFORMATION ===
-elif menu == "🧹 Transformation":
-    st.header("🛠️ ETL Transformation Engine")
-    
-    if st.session_state['df'] is None:
-        st.warning("⚠️ No data loaded. Please go to the Ingestion module.")
-    else:
-        df = st.session_state['df']
-        
-        col1, col2 = st.columns([1, 1])
-        
-        with col1:
-            with st.container(border=True):
-                st.subheader("🗑️ Drop Features")
-                cols_to_drop = st.multiselect("Select columns to remove", df.columns)
-                if st.button("Execute Drop", type="primary"):
-                    st.session_state['df'] = df.drop(columns=cols_to_drop)
-                    st.success("Columns removed successfully.")
-                    st.rerun()
+@st.fragment
+def filter_block(df: pd.DataFrame) -> None:
+    """
+    Advanced range filter; picking a column or range reruns only this block.
+    """
+    with st.expander("🔎 Advanced Filtering (New)"):
+        filter_col = st.selectbox("Filter by Column", df.columns)
+        _, min_val, max_val, _ = column_meta(st.session_state['file_key'], tuple(st.session_state['ops']))[filter_col]
+        if min_val is not None:
+            val_range = st.slider(f"Select range for {filter_col}", min_val, max_val, (min_val, max_val))
+            
+            if st.button("Apply Filter") and record_op(("filter", filter_col, val_range[0], val_range[1])):
+                st.success("Filter applied!")
+                st.rerun()
 
-        with col2:
-            with st.container(border=True):
-                st.subheader("🩹 Impute Missing Values")
-                col_option = st.selectbox("Select Target Column", df.columns)
-                method = st.radio("Imputation Method", ["Drop Rows", "Fill with 0", "Fill with Mean"])
-                
-                if st.button("Apply Transformation"):
-                    if method == "Drop Rows":
-                        st.session_state['df'] = df.dropna(subset=[col_option])
-                    elif method == "Fill with 0":
-                        st.session_state['df'][col_option] = df[col_option].fillna(0)
-                    elif method == "Fill with Mean":
-                        if pd.api.types.is_numeric_dtype(df[col_option]):
-                            st.session_state['df'][col_option] = df[col_option].fillna(df[col_option].mean())
-                        else:
-                            st.error("Operation failed: Cannot calculate mean for non-numeric column.")
-                            st.stop()
+@require_df
+def transformation_module(df: pd.DataFrame) -> None:
+    """
+    No-code cleaning steps (drop, impute, filter) and processed dataset export.
+    """
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        with st.container(border=True):
+            st.subheader("🗑️ Drop Features")
+            cols_to_drop = st.multiselect("Select columns to remove", df.columns)
+            if st.button("Execute Drop", type="primary") and record_op(("drop", tuple(cols_to_drop))):
+                st.success("Columns removed successfully.")
+                st.rerun()
+    
+    with col2:
+        with st.container(border=True):
+            st.subheader("🩹 Impute Missing Values")
+            col_option = st.selectbox("Select Target Column", df.columns)
+            method = st.radio("Imputation Method", ["Drop Rows", "Fill with 0", "Fill with Mean"])
+    
+            if st.button("Apply Transformation"):
+                if method == "Drop Rows":
+                    op = ("dropna", col_option)
+                elif method == "Fill with 0":
+                    op = ("fillna", col_option, 0)
+                elif method == "Fill with Mean":
+                    if pd.api.types.is_numeric_dtype(df[col_option]):
+                        op = ("fillna_mean", col_option)
+                    else:
+                        st.error("Operation failed: Cannot calculate mean for non-numeric column.")
+                        st.stop()
+                if record_op(op):
                     st.success("Transformation applied.")
                     st.rerun()
+    
+    st.divider()
+    
+    # NEW FEATURE: Filtering
+    filter_block(df)
+    
+    st.subheader("✅ Processed Data Snapshot")
+    snapshot_cols = st.multiselect("Snapshot columns", df.columns, default=list(df.columns[:10]))
+    st.dataframe(preview_table(df, snapshot_cols, rows=10), use_container_width=True)
+    
+    export_format = st.radio("Format", ["CSV", "Parquet (zstd)"], horizontal=True)
+    key, ops = st.session_state['file_key'], tuple(st.session_state['ops'])
+    if export_format == "CSV":
+        data = convert_df(key, ops)
+        file_name = f"processed_{st.session_state['file_name']}"
+        mime = 'text/csv'
+    else:
+        data = convert_df_parquet(key, ops)
+        file_name = f"processed_{Path(st.session_state['file_name']).stem}.parquet"
+        mime = 'application/vnd.apache.parquet'
+    st.download_button(
+        label="⬇️ Download Processed Dataset",
+        data=data,
+        file_name=file_name,
+        mime=mime
+    )
 
-        st.divider()
-        
-        # NEW FEATURE: Filtering
-        with st.expander("🔎 Advanced Filtering (New)"):
-            filter_col = st.selectbox("Filter by Column", df.columns)
-            if pd.api.types.is_numeric_dtype(df[filter_col]):
-                min_val = float(df[filter_col].min())
-                max_val = float(df[filter_col].max())
-                val_range = st.slider(f"Select range for {filter_col}", min_val, max_val, (min_val, max_val))
-                
-                if st.button("Apply Filter"):
-                    st.session_state['df'] = df[(df[filter_col] >= val_range[0]) & (df[filter_col] <= val_range[1])]
-                    st.success("Filter applied!")
-                    st.rerun()
-
-        st.subheader("✅ Processed Data Snapshot")
-        st.dataframe(st.session_state['df'].head(10), use_container_width=True)
-        
-        csv = convert_df(st.session_state['df'])
-        st.download_button(
-            label="⬇️ Download Processed Dataset",
-            data=csv,
-            file_name=f"processed_{st.session_state['file_name']}",
-            mime='text/csv'
+# === MODULE 4: VISUALIZATION ===
+@require_df
+@st.fragment
+def visualization_module(df: pd.DataFrame) -> None:
+    """
+    Configurable Plotly chart over the processed dataset.
+    """
+    with st.container(border=True):
+        st.subheader("Chart Configuration")
+        c1, c2, c3, c4 = st.columns(4)
+    
+        chart_type = c1.selectbox("Chart Type", ["Bar", "Line", "Scatter", "Histogram", "Box"])
+        x_axis = c2.selectbox("X-Axis", df.columns)
+        y_axis = c3.selectbox("Y-Axis", df.columns) 
+        color_enc = c4.selectbox("Color Grouping (Optional)", [None] + list(df.columns))
+    
+    st.write("---")
+    
+    try:
+        fig = None
+        plot_df = df
+        meta = column_meta(st.session_state['file_key'], tuple(st.session_state['ops']))
+        lttb_applicable = (
+            LTTBDownsampler is not None and color_enc is None and x_axis != y_axis
+            and len(df) > LTTB_MAX_POINTS and df[x_axis].dtype.kind in "iufM" and df[y_axis].dtype.kind in "iuf"
         )
+        if chart_type == "Line" and lttb_applicable:
+            plot_df = lttb_downsample(st.session_state['file_key'], tuple(st.session_state['ops']), x_axis, y_axis)
+            st.caption(f"Downsampled from {len(df):,} to {len(plot_df):,} points (LTTB).")
+        elif chart_type in ("Bar", "Line") and x_axis != y_axis and meta[x_axis][3] > AGG_MIN_CATEGORIES:
+            plot_df = aggregate_by_x(df, x_axis, y_axis, color_enc)
+            st.caption(f"{x_axis} has more than {AGG_MIN_CATEGORIES:,} distinct values: showing mean {y_axis} per {x_axis}.")
+    
+        if chart_type == "Bar":
+            fig = px.bar(plot_df, x=x_axis, y=y_axis, color=color_enc, title=f"{y_axis} by {x_axis}", template="plotly_white")
+        elif chart_type == "Line":
+            fig = px.line(plot_df, x=x_axis, y=y_axis, color=color_enc, title=f"{y_axis} Trends", template="plotly_white")
+        elif chart_type == "Scatter":
+            render_mode = "webgl" if len(df) > WEBGL_MIN_POINTS else "svg"
+            fig = px.scatter(df, x=x_axis, y=y_axis, color=color_enc, title=f"Correlation: {y_axis} vs {x_axis}",
+                             render_mode=render_mode, template="plotly_white")
+        elif chart_type == "Histogram":
+            fig = px.histogram(df, x=x_axis, color=color_enc, title=f"Distribution of {x_axis}", template="plotly_white")
+        elif chart_type == "Box":
+            fig = px.box(df, x=x_axis, y=y_axis, color=color_enc, title=f"Distribution of {y_axis} by {x_axis}", template="plotly_white")
+    
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+    
+            with st.expander("🔎 View Chart Data"):
+                st.dataframe(df[[x_axis, y_axis]].head(20))
+    
+    except Exception as e:
+        st.error(f"⚠️ Error creating chart: {e}. Ensure Y-Axis is numeric for this chart type.")
 
-# === MODULE 4: VISUALIZATION ===
+# --- 6. ROUTING ---
+if menu == "📁 Ingestion":
+    st.header("📂 Data Ingestion Interface")
+    ingestion_module()
+elif menu == "🔍 Profiling":
+    st.header("📊 Automated Data Profiling")
+    profiling_module()
+elif menu == "🧹 Transformation":
+    st.header("🛠️ ETL Transformation Engine")
+    transformation_module()
 elif menu == "📈 Visualization":
     st.header("📊 Interactive Analytics Dashboard")
-    
-    if st.session_state['df'] is None:
-        st.warning("⚠️ No data loaded. Please go to the Ingestion module.")
-    else:
-        df = st.session_state['df']
-        
-        with st.container(border=True):
-            st.subheader("Chart Configuration")
-            c1, c2, c3, c4 = st.columns(4)
-            
-            chart_type = c1.selectbox("Chart Type", ["Bar", "Line", "Scatter", "Histogram", "Box"])
-            x_axis = c2.selectbox("X-Axis", df.columns)
-            y_axis = c3.selectbox("Y-Axis", df.columns) 
-            color_enc = c4.selectbox("Color Grouping (Optional)", [None] + list(df.columns))
-            
-        st.write("---")
-        
-        try:
-            fig = None
-            if chart_type == "Bar":
-                fig = px.bar(df, x=x_axis, y=y_axis, color=color_enc, title=f"{y_axis} by {x_axis}", template="plotly_white")
-            elif chart_type == "Line":
-                fig = px.line(df, x=x_axis, y=y_axis, color=color_enc, title=f"{y_axis} Trends", template="plotly_white")
-            elif chart_type == "Scatter":
-                fig = px.scatter(df, x=x_axis, y=y_axis, color=color_enc, title=f"Correlation: {y_axis} vs {x_axis}", template="plotly_white")
-            elif chart_type == "Histogram":
-                fig = px.histogram(df, x=x_axis, color=color_enc, title=f"Distribution of {x_axis}", template="plotly_white")
-            elif chart_type == "Box":
-                fig = px.box(df, x=x_axis, y=y_axis, color=color_enc, title=f"Distribution of {y_axis} by {x_axis}", template="plotly_white")
-            
-            if fig:
-                st.plotly_chart(fig, use_container_width=True)
-                
-                with st.expander("🔎 View Chart Data"):
-                    st.dataframe(df[[x_axis, y_axis]].head(20))
-                    
-        except Exception as e:
-            st.error(f"⚠️ Error creating chart: {e}. Ensure Y-Axis is numeric for this chart type.")
\ No newline at end of file
+    visualization_module()